@@ -1,59 +1,71 @@
 from __future__ import annotations
 
 import re
+import shutil
 from pathlib import Path
 
 REPO = Path(__file__).resolve().parents[1]
 DIST = REPO / "ui" / "dist"
 OUT = REPO / "src" / "papersketch" / "assets" / "papersketch-inline.html"
 
-def read_text(p: Path) -> str:
-    return p.read_text(encoding="utf-8")
+# /assets/*.js and /assets/*.css references in dist/index.html
+_JS_RE = re.compile(rb'src="/assets/([^"]+\.js)"')
+_CSS_RE = re.compile(rb'href="/assets/([^"]+\.css)"')
 
-def main() -> None:
-    index_html = read_text(DIST / "index.html")
-
-    # Extract /assets/*.js and /assets/*.css from dist/index.html
-    js_match = re.search(r'src="/assets/([^"]+\.js)"', index_html)
-    css_match = re.search(r'href="/assets/([^"]+\.css)"', index_html)
-
-    if not js_match:
-        raise RuntimeError("Could not find JS bundle in dist/index.html")
-    js_file = DIST / "assets" / js_match.group(1)
-    if not js_file.exists():
-        raise RuntimeError(f"JS file not found: {js_file}")
-
-    css_text = ""
-    if css_match:
-        css_file = DIST / "assets" / css_match.group(1)
-        if not css_file.exists():
-            raise RuntimeError(f"CSS file not found: {css_file}")
-        css_text = read_text(css_file)
-
-    js_text = read_text(js_file)
-
-    # Create a self-contained Skybridge widget HTML
-    html = f"""<!doctype html>
+# Self-contained Skybridge widget HTML, split around the inlined bundles
+HEAD_PREFIX = b"""<!doctype html>
 <html lang="en">
   <head>
     <meta charset="UTF-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
     <title>PaperSketch</title>
     <style>
-{css_text}
+"""
+MID = b"""
     </style>
   </head>
   <body>
     <div id="root"></div>
     <script type="module">
-{js_text}
+"""
+TAIL = b"""
     </script>
   </body>
 </html>
 """
 
+def copy_into(src: Path, dst) -> None:
+    with src.open("rb") as f:
+        shutil.copyfileobj(f, dst)
+
+def main() -> None:
+    index_html = (DIST / "index.html").read_bytes()
+
+    # Extract /assets/*.js and /assets/*.css from dist/index.html
+    js_match = _JS_RE.search(index_html)
+    css_match = _CSS_RE.search(index_html)
+
+    if not js_match:
+        raise RuntimeError("Could not find JS bundle in dist/index.html")
+    js_file = DIST / "assets" / js_match.group(1).decode("utf-8")
+    if not js_file.exists():
+        raise RuntimeError(f"JS file not found: {js_file}")
+
+    css_file = None
+    if css_match:
+        css_file = DIST / "assets" / css_match.group(1).decode("utf-8")
+        if not css_file.exists():
+            raise RuntimeError(f"CSS file not found: {css_file}")
+
+    # Stream the bundles straight into the output; neither is held in memory whole
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(html, encoding="utf-8")
+    with OUT.open("wb") as f:
+        f.write(HEAD_PREFIX)
+        if css_file is not None:
+            copy_into(css_file, f)
+        f.write(MID)
+        copy_into(js_file, f)
+        f.write(TAIL)
     print(f"Wrote widget HTML: {OUT}")
 
 if __name__ == "__main__":
@@ -1,8 +1,16 @@
 # src/papersketch/client.py
 
+import importlib.util
+
 import httpx
 from .config import PAPERSKETCH_ENDPOINT, PAPERSKETCH_API_KEY, REQUEST_TIMEOUT
 
+# Response keys the API has used for the summary markdown, in priority order
+_SUMMARY_KEYS = ("paperSketch", "summary", "paper_sketch")
+
+# HTTP/2 needs the optional "h2" package (httpx[http2]); fall back to HTTP/1.1 keep-alive.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
 
 class PaperSketchClient:
     """Thin wrapper around the Papersketch HTTP API."""
@@ -13,16 +21,27 @@ class PaperSketchClient:
                 "PAPERSKETCH_API_KEY is not set. "
                 "Add it to your .env file in the project root."
             )
+        # One pooled client so connections (and TLS sessions) are reused across calls
+        self._http = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=REQUEST_TIMEOUT,
+            headers={"X-API-Key": PAPERSKETCH_API_KEY},
+        )
 
-    def summarize(self, url: str, lang: str = "en") -> dict:
+    async def summarize(self, url: str, lang: str = "en") -> dict:
         try:
-            resp = httpx.get(
+            resp = await self._http.get(
                 PAPERSKETCH_ENDPOINT,
                 params={"url": url, "lang": lang},
-                headers={"X-API-Key": PAPERSKETCH_API_KEY},
-                timeout=REQUEST_TIMEOUT,
             )
             resp.raise_for_status()
-            return resp.json()
+            data = resp.json()
         except httpx.ReadTimeout:
             raise RuntimeError("PaperSketch request timed out; try again or use an uploaded PDF.")
+
+        # Normalize so callers can always read data["paperSketch"]
+        data["paperSketch"] = next((data[k] for k in _SUMMARY_KEYS if data.get(k)), "")
+        return data
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
@@ -3,8 +3,11 @@
 import os
 from dotenv import load_dotenv
 
-# Load variables from .env at project root
-load_dotenv()
+# Load variables from .env at project root (once per process tree; the flag is
+# inherited by subprocesses so they skip the filesystem search)
+if not os.getenv("_PAPERSKETCH_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_PAPERSKETCH_ENV_LOADED"] = "1"
 
 PAPERSKETCH_ENDPOINT = "https://api.scholar.club/api/v1/papersketch_url/"
 PAPERSKETCH_API_KEY = os.getenv("PAPERSKETCH_API_KEY")
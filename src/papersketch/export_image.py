@@ -1,25 +1,40 @@
 # src/papersketch/export_image.py
 from __future__ import annotations
 
+import asyncio
 import base64
 import html as _html
+import os
 import re
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, List, Optional, Tuple
 
-from markdown import markdown
+from markdown import Markdown
+
+
+# Built once; extensions are loaded at import and reset() between documents.
+_MD = Markdown(extensions=["tables", "fenced_code", "sane_lists"])
 
 
 # -----------------------------
 # Header parsing utilities
 # -----------------------------
 
-_BULLET_RE = re.compile(r"^\s*(?:[-*•])\s+(.*)\s*$", re.UNICODE)
+_BULLET_CHARS = frozenset("-*•")
+_NUMBERED_RE = re.compile(r"^\s*\d+\s*[.)]\s+.+$")
+_NUMBERED_STRIP_RE = re.compile(r"^\d+\s*[.)]\s+")
+
+# Lowercased "<field>:" prefixes recognised in the summary header
+_TITLE_KEY = "paper title:"
+_AUTHORS_KEY = "author information:"
+_INSTS_KEY = "institutional information:"
 
 
 def _strip_bullet(line: str) -> str:
-    m = _BULLET_RE.match(line)
-    return m.group(1).strip() if m else line.strip()
+    s = line.lstrip()
+    if s[:1] in _BULLET_CHARS and s[1:2].isspace():
+        return s[2:].strip()
+    return line.strip()
 
 
 def _is_field_line(line: str, field_name: str) -> bool:
@@ -33,9 +48,10 @@ def _field_value_after_colon(line: str) -> str:
 
 
 def _is_list_item(line: str) -> bool:
-    if _BULLET_RE.match(line):
+    s = line.lstrip()
+    if s[:1] in _BULLET_CHARS and s[1:2].isspace():
         return True
-    return bool(re.match(r"^\s*\d+\s*[.)]\s+.+$", line))
+    return bool(_NUMBERED_RE.match(line))
 
 
 def _extract_title_authors_institutions(
@@ -53,16 +69,23 @@ def _extract_title_authors_institutions(
 
     mode = None  # None | "authors" | "insts"
 
-    for raw in lines:
-        line = raw.rstrip("\n")
+    # splitlines() already drops line endings (\n, \r\n, ...)
+    for idx, line in enumerate(lines):
+        # All header fields resolved: the rest is body, copy it through untouched
+        if mode is None and title and authors and insts:
+            remaining.extend(lines[idx:])
+            break
+
+        stripped = _strip_bullet(line)
+        lower = stripped.lower()
 
-        if _is_field_line(line, "Paper Title"):
-            title = _field_value_after_colon(line)
+        if lower.startswith(_TITLE_KEY):
+            title = stripped.split(":", 1)[1].strip()
             mode = None
             continue
 
-        if _is_field_line(line, "Author Information"):
-            v = _field_value_after_colon(line)
+        if lower.startswith(_AUTHORS_KEY):
+            v = stripped.split(":", 1)[1].strip()
             if v:
                 authors = [v]
                 mode = None
@@ -71,8 +94,8 @@ def _extract_title_authors_institutions(
                 mode = "authors"
             continue
 
-        if _is_field_line(line, "Institutional Information"):
-            v = _field_value_after_colon(line)
+        if lower.startswith(_INSTS_KEY):
+            v = stripped.split(":", 1)[1].strip()
             if v:
                 insts = [v]
                 mode = None
@@ -87,8 +110,7 @@ def _extract_title_authors_institutions(
                 continue
 
             if _is_list_item(line):
-                item = _strip_bullet(line)
-                item = re.sub(r"^\d+\s*[.)]\s+", "", item).strip()
+                item = _NUMBERED_STRIP_RE.sub("", stripped, count=1).strip()
                 if item:
                     (authors if mode == "authors" else insts).append(item)
                 continue
@@ -98,14 +120,15 @@ def _extract_title_authors_institutions(
                 (authors if mode == "authors" else insts).append(txt)
                 continue
 
-        remaining.append(raw)
+        remaining.append(line)
 
-    authors_html = ", ".join(_html.escape(a) for a in authors) if authors else ""
+    # Escape each list in one call: join on a NUL sentinel, escape, then re-split.
+    authors_html = _html.escape("\x00".join(authors)).replace("\x00", ", ") if authors else ""
 
     institutions_html = ""
     if insts:
-        lis = "\n".join(f"<li>{_html.escape(x)}</li>" for x in insts)
-        institutions_html = f"<ul class='paper-inst'>{lis}</ul>"
+        lis = _html.escape("\x00".join(insts)).replace("\x00", "</li>\n<li>")
+        institutions_html = f"<ul class='paper-inst'><li>{lis}</li></ul>"
 
     return title.strip(), authors_html, institutions_html, "\n".join(remaining).strip()
 
@@ -114,9 +137,11 @@ def _extract_title_authors_institutions(
 # Asset loader (logo)
 # -----------------------------
 
+ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+
+
 def _load_asset_data_url(filename: str) -> str:
-    assets_dir = Path(__file__).resolve().parent / "assets"
-    p = assets_dir / filename
+    p = ASSETS_DIR / filename
     data = p.read_bytes()
     b64 = base64.b64encode(data).decode("ascii")
 
@@ -125,56 +150,126 @@ def _load_asset_data_url(filename: str) -> str:
     return f"data:{mime};base64,{b64}"
 
 
+# The logo never changes at runtime; inline it once per process.
+try:
+    _LOGO_DATA_URL = _load_asset_data_url("scholarLogo.png")
+except OSError:
+    _LOGO_DATA_URL = ""
+
+
 # -----------------------------
-# Main exporter
+# Shared browser (launched once, reused across exports)
 # -----------------------------
 
-async def markdown_to_png_bytes(
-    markdown_text: str,
-    *,
-    width_px: int = 1200,
-    device_scale_factor: float = 2.0,
-) -> bytes:
+# Low-overhead flags for headless screenshot rendering
+_CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-software-rasterizer",
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-features=TranslateUI,BlinkGenPropertyTrees",
+    "--mute-audio",
+    "--hide-scrollbars",
+]
+# Containers without user namespaces can opt out of the Chromium sandbox explicitly
+if os.environ.get("PAPERSKETCH_CHROMIUM_NO_SANDBOX") == "1":
+    _CHROMIUM_ARGS.append("--no-sandbox")
+
+# Resource types the screenshot doesn't need; only the document and images matter
+_BLOCKED_RESOURCE_TYPES = frozenset(
+    {"font", "stylesheet", "media", "websocket", "manifest", "other"}
+)
+
+_browser_lock = asyncio.Lock()
+_playwright: Optional[Any] = None
+_browser: Optional[Any] = None
+
+
+async def _get_browser() -> Any:
     """
-    Render PaperSketch markdown into a single tall PNG with a right-aligned footer.
+    Return the process-wide Chromium instance, launching it on first use
+    (or again if the previous one disconnected).
     """
+    global _playwright, _browser
 
-    title, authors_html, institutions_html, remaining_md = (
-        _extract_title_authors_institutions(markdown_text)
-    )
+    async with _browser_lock:
+        if _browser is not None and _browser.is_connected():
+            return _browser
 
-    body_html = markdown(
-        remaining_md,
-        extensions=["tables", "fenced_code", "sane_lists"],
-    )
+        try:
+            from playwright.async_api import async_playwright
+        except Exception as e:
+            raise RuntimeError(
+                "Playwright not installed. Run:\n"
+                "  uv add playwright\n"
+                "  playwright install chromium"
+            ) from e
+
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+        # headless=True runs the lightweight chromium-headless-shell build
+        _browser = await _playwright.chromium.launch(headless=True, args=_CHROMIUM_ARGS)
+        return _browser
+
+
+async def prewarm_browser() -> None:
+    """
+    Launch the shared browser ahead of the first export.
+    """
+    await _get_browser()
 
-    header_html = ""
-    if title or authors_html or institutions_html:
-        header_html = f"""
-        <header class="paper-header">
-          {f'<div class="paper-title">{_html.escape(title)}</div>' if title else ''}
-          {f'<div class="paper-authors">{authors_html}</div>' if authors_html else ''}
-          {institutions_html if institutions_html else ''}
-        </header>
-        """
 
-    logo_data_url = _load_asset_data_url("scholarLogo.png")
+async def _block_unneeded_resources(route: Any) -> None:
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
-    footer_html = f"""
-    <footer class="sketch-footer">
-      <div class="footer-inner">
-        <img class="sketch-logo" src="{logo_data_url}" alt="Scholar logo" />
-        <div class="sketch-url">https://scholar.club</div>
-      </div>
-    </footer>
+
+async def _wait_for_images(page: Any, timeout: float = 8) -> None:
     """
+    Wait until every image is fetched *and* decoded, without polling.
+    """
+    try:
+        await asyncio.wait_for(
+            page.evaluate(
+                """
+                () => Promise.all(
+                  Array.from(document.images || []).map(i => i.decode().catch(() => null))
+                )
+                """
+            ),
+            timeout=timeout,
+        )
+    except Exception:
+        pass
 
 
-    html_doc = f"""<!DOCTYPE html>
-<html>
-<head>
-<meta charset="utf-8" />
-<style>
+async def close_browser() -> None:
+    """
+    Shut down the shared browser and Playwright driver (called on server shutdown).
+    """
+    global _playwright, _browser
+
+    async with _browser_lock:
+        if _browser is not None:
+            try:
+                await _browser.close()
+            except Exception:
+                pass
+            _browser = None
+        if _playwright is not None:
+            await _playwright.stop()
+            _playwright = None
+
+
+# -----------------------------
+# HTML template
+# -----------------------------
+
+# Static stylesheet; only the page width varies per render.
+_CSS_TEMPLATE = """<style>
 :root {{
   --text: #111;
   --muted: #444;
@@ -315,54 +410,109 @@ pre {{
   color: #555;
   letter-spacing: 0.2px;
 }}
-</style>
-</head>
-<body>
-  <div class="page">
-    {header_html}
-    <div class="content">
-      {body_html}
-    </div>
-    {footer_html}
-  </div>
-</body>
-</html>
-"""
+</style>"""
+
+_FOOTER_HTML = f"""
+    <footer class="sketch-footer">
+      <div class="footer-inner">
+        {f'<img class="sketch-logo" src="{_LOGO_DATA_URL}" alt="Scholar logo" />' if _LOGO_DATA_URL else ''}
+        <div class="sketch-url">https://scholar.club</div>
+      </div>
+    </footer>
+    """
+
+
+def _build_html(
+    *,
+    title: str,
+    authors_html: str,
+    institutions_html: str,
+    body_html: str,
+    width_px: int,
+) -> str:
+    """
+    Assemble the standalone HTML document rendered by Chromium.
+    """
+    header_html = ""
+    if title or authors_html or institutions_html:
+        header_html = f"""
+        <header class="paper-header">
+          {f'<div class="paper-title">{_html.escape(title)}</div>' if title else ''}
+          {f'<div class="paper-authors">{authors_html}</div>' if authors_html else ''}
+          {institutions_html if institutions_html else ''}
+        </header>
+        """
+
+    return "".join(
+        [
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8" />\n',
+            _CSS_TEMPLATE.format(width_px=width_px),
+            '\n</head>\n<body>\n  <div class="page">\n    ',
+            header_html,
+            '\n    <div class="content">\n      ',
+            body_html,
+            "\n    </div>\n    ",
+            _FOOTER_HTML,
+            "\n  </div>\n</body>\n</html>\n",
+        ]
+    )
+
+
+async def _browser_and_html(markdown_text: str, *, width_px: int) -> Tuple[Any, str]:
+    """
+    Convert markdown to the export HTML while the shared browser launches
+    (or is fetched), so the two latencies overlap.
+    """
+    browser_task = asyncio.create_task(_get_browser())
+    # Yield once so the launch request is sent before the CPU-bound conversion
+    await asyncio.sleep(0)
 
     try:
-        from playwright.async_api import async_playwright
-    except Exception as e:
-        raise RuntimeError(
-            "Playwright not installed. Run:\n"
-            "  uv add playwright\n"
-            "  playwright install chromium"
-        ) from e
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        try:
-            page = await browser.new_page(
-                viewport={"width": width_px, "height": 900},
-                device_scale_factor=device_scale_factor,
-            )
+        title, authors_html, institutions_html, remaining_md = (
+            _extract_title_authors_institutions(markdown_text)
+        )
 
-            await page.set_content(html_doc, wait_until="load")
+        body_html = _MD.reset().convert(remaining_md)
 
-            try:
-                await page.wait_for_function(
-                    """
-                    () => {
-                      const imgs = Array.from(document.images || []);
-                      if (!imgs.length) return true;
-                      return imgs.every(i => i.complete && i.naturalWidth > 0);
-                    }
-                    """,
-                    timeout=8000,
-                )
-            except Exception:
-                pass
+        html_doc = _build_html(
+            title=title,
+            authors_html=authors_html,
+            institutions_html=institutions_html,
+            body_html=body_html,
+            width_px=width_px,
+        )
+    except BaseException:
+        browser_task.cancel()
+        raise
+
+    return await browser_task, html_doc
+
+
+# -----------------------------
+# Main exporter
+# -----------------------------
+
+async def markdown_to_png_bytes(
+    markdown_text: str,
+    *,
+    width_px: int = 1200,
+    device_scale_factor: float = 2.0,
+) -> bytes:
+    """
+    Render PaperSketch markdown into a single tall PNG with a right-aligned footer.
+    """
+    browser, html_doc = await _browser_and_html(markdown_text, width_px=width_px)
+    context = await browser.new_context(
+        viewport={"width": width_px, "height": 900},
+        device_scale_factor=device_scale_factor,
+    )
+    try:
+        page = await context.new_page()
+        await page.route("**/*", _block_unneeded_resources)
+
+        await page.set_content(html_doc, wait_until="load")
 
-            await page.wait_for_timeout(200)
-            return await page.screenshot(full_page=True, type="png")
-        finally:
-            await browser.close()
\ No newline at end of file
+        await _wait_for_images(page)
+        return await page.screenshot(full_page=True, type="png")
+    finally:
+        await context.close()
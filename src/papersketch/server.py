@@ -1,40 +1,90 @@
 # src/papersketch/server.py
 from __future__ import annotations
 
-from dotenv import load_dotenv
-load_dotenv()
+import contextlib
+import sys
 
 import uvicorn
-from starlette.responses import Response, PlainTextResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse, PlainTextResponse
 from starlette.routing import Route
 
-from .tools import mcp, cache_get_file
+# Importing config (via tools) loads .env before anything reads the environment
+from .tools import mcp, cache_clear, cache_get_file, close_client
 
 app = mcp.streamable_http_app()
 
+# Wrap FastMCP's lifespan so the shared Playwright browser, the PaperSketch
+# HTTP client and the cached download files are cleaned up on shutdown
+_mcp_lifespan = app.router.lifespan_context
 
-def download_file(request):
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    async with _mcp_lifespan(app):
+        try:
+            yield
+        finally:
+            # The exporters are imported lazily; only close a browser if one could exist
+            export_image = sys.modules.get(f"{__package__}.export_image")
+            if export_image is not None:
+                await export_image.close_browser()
+            await close_client()
+            cache_clear()
+
+
+app.router.lifespan_context = _lifespan
+
+
+# async so the token lookup runs on the event loop, alongside the tool handlers
+# that mutate the same file cache (sync endpoints would run in the threadpool)
+async def download_file(request):
     token = request.path_params["token"]
     item = cache_get_file(token)
     if not item:
         return PlainTextResponse("File not found or expired", status_code=404)
 
-    file_bytes, filename, mime_type = item
-    return Response(
-        content=file_bytes,
+    # FileResponse streams from disk (sendfile where the server supports it)
+    # and sets Content-Length from the file size.
+    file_path, filename, mime_type = item
+    return FileResponse(
+        file_path,
         media_type=mime_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Cache-Control": "no-store",
-        },
+        filename=filename,
+        headers={"Cache-Control": "no-store"},
     )
 
 
-# New generic route (recommended)
-app.router.routes.append(Route("/papersketch/file/{token}", download_file, methods=["GET"]))
+class _CompressionExceptImages:
+    """
+    Compress JSON / PDF responses, but pass cached images straight through:
+    PNG is already deflate-compressed, so re-encoding only costs CPU.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        # GZipMiddleware leaves text/event-stream alone, so the MCP SSE stream stays unbuffered
+        self.compressed = GZipMiddleware(app, minimum_size=1024)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(("/papersketch/file/", "/papersketch/pdf/")):
+            item = cache_get_file(scope["path"].rsplit("/", 1)[-1])
+            if item and item[2].startswith("image/"):
+                await self.app(scope, receive, send)
+                return
+        await self.compressed(scope, receive, send)
+
+
+app.add_middleware(_CompressionExceptImages)
 
-# Backward compatibility route (if old widget still uses /papersketch/pdf/...)
-app.router.routes.append(Route("/papersketch/pdf/{token}", download_file, methods=["GET"]))
+app.router.routes.extend(
+    [
+        # New generic route (recommended)
+        Route("/papersketch/file/{token}", download_file, methods=["GET"]),
+        # Backward compatibility route (if old widget still uses /papersketch/pdf/...)
+        Route("/papersketch/pdf/{token}", download_file, methods=["GET"]),
+    ]
+)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,29 @@
 # src/papersketch/tools.py
 from __future__ import annotations
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+import asyncio
+import hashlib
+import heapq
+import logging
+import secrets
+import sys
+import tempfile
 import time
-import uuid
 import os
 
+import fastjsonschema
 import mcp.types as types
 from mcp.server.fastmcp import FastMCP
 
 from .client import PaperSketchClient
-from .export_image import markdown_to_png_bytes
 
 TOOL_NAME = "summarize_paper"
+START_TOOL_NAME = "summarize_paper_start"
+POLL_TOOL_NAME = "summarize_paper_poll"
 WIDGET_TEMPLATE_URI = "ui://widget/papersketch-inline.html"
 WIDGET_TITLE = "PaperSketch summary"
 WIDGET_INVOKING = "Generating PaperSketch…"
@@ -28,106 +38,322 @@ _client = PaperSketchClient()
 ASSETS_DIR = Path(__file__).resolve().parent / "assets"
 WIDGET_HTML_PATH = ASSETS_DIR / "papersketch-inline.html"
 
+
+def _env_number(name: str, default: Any, cast: type = int) -> Any:
+    # Malformed values fall back to the default rather than failing at import.
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
 # -----------------------------
-# File cache (in-memory)
-# token -> (file_bytes, filename, mime_type, expires_at_epoch)
+# File cache (LRU-bounded, files on disk)
+# token -> CacheEntry(file_path, filename, mime_type, expires_at)
+# Rendered bytes live in temp files so downloads can be served with sendfile.
 # -----------------------------
-_FILE_CACHE: Dict[str, Tuple[bytes, str, str, float]] = {}
+@dataclass(slots=True)
+class CacheEntry:
+    file_path: str
+    filename: str
+    mime_type: str
+    expires_at: float  # epoch seconds
+
+
+_FILE_CACHE: "OrderedDict[str, CacheEntry]" = OrderedDict()
+_FILE_CACHE_MAX = _env_number("PAPERSKETCH_CACHE_MAX", 128)
+if _FILE_CACHE_MAX <= 0:
+    # 0 would evict every file as soon as it is cached
+    _FILE_CACHE_MAX = 128
+# Min-heap of (expires_at, token) so cleanup only touches expired entries
+_EXPIRY_HEAP: List[Tuple[float, str]] = []
 _FILE_TTL_SECONDS = 15 * 60  # 15 minutes
+# blake2b(markdown) -> token, so identical summaries share one rendered file
+_HASH_TO_TOKEN: "OrderedDict[str, str]" = OrderedDict()
+
+
+# -----------------------------
+# Summary cache (in-memory, LRU-bounded)
+# (url, lang) -> (api_response, file_token, expires_at_epoch)
+# -----------------------------
+_SUMMARY_CACHE: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], Optional[str], float]]" = OrderedDict()
+_SUMMARY_TTL_SECONDS = _env_number("PAPERSKETCH_SUMMARY_TTL", 600.0, float)
+
+
+# Set PAPERSKETCH_LOG_LEVEL=WARNING in production to skip the per-call INFO writes.
+# Unknown level names fall back to INFO rather than failing at import.
+_log_level = os.environ.get("PAPERSKETCH_LOG_LEVEL", "INFO").upper()
+logger = logging.getLogger("papersketch")
+logger.setLevel(logging.getLevelNamesMapping().get(_log_level, logging.INFO))
+if not logger.handlers:
+    _log_handler = logging.StreamHandler(sys.stdout)
+    _log_handler.setFormatter(logging.Formatter("[PAPERSKETCH MCP] %(message)s"))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
 
 
 def log(msg: str) -> None:
-    print(f"[PAPERSKETCH MCP] {msg}", flush=True)
+    logger.info(msg)
+
+
+# -----------------------------
+# Renderers (selected with PAPERSKETCH_RENDERER=png|pdf)
+# -----------------------------
+
+class Renderer(Protocol):
+    async def prewarm(self) -> None:
+        """Start any expensive setup (e.g. the browser) ahead of render()."""
+        ...
+
+    async def render(self, markdown_text: str) -> Tuple[bytes, str, str]:
+        """Return (file_bytes, filename, mime_type)."""
+        ...
+
+
+async def _prewarm_browser() -> None:
+    # Both renderers share the Playwright browser from export_image.
+    # Best effort: a failure here resurfaces (and is reported) at render time.
+    try:
+        from .export_image import prewarm_browser
+
+        await prewarm_browser()
+    except Exception as e:
+        log(f"Browser prewarm failed: {e}")
 
 
-def _cache_put_file(file_bytes: bytes, filename: str, mime_type: str) -> str:
-    token = uuid.uuid4().hex
-    _FILE_CACHE[token] = (file_bytes, filename, mime_type, time.time() + _FILE_TTL_SECONDS)
+class PngRenderer:
+    async def prewarm(self) -> None:
+        await _prewarm_browser()
+
+    async def render(self, markdown_text: str) -> Tuple[bytes, str, str]:
+        # Imported on first render to keep the exporters out of server startup
+        from .export_image import markdown_to_png_bytes
+
+        # Tune these for your preferred look:
+        # - width_px ~ 1000-1400 usually good
+        # - device_scale_factor 2.0 = crisp text
+        png_bytes = await markdown_to_png_bytes(markdown_text, width_px=1200, device_scale_factor=2.0)
+        return png_bytes, "paper_sketch.png", "image/png"
+
+
+class PdfRenderer:
+    async def prewarm(self) -> None:
+        await _prewarm_browser()
+
+    async def render(self, markdown_text: str) -> Tuple[bytes, str, str]:
+        from .export_pdf import markdown_to_pdf_bytes
+
+        pdf_bytes = await markdown_to_pdf_bytes(markdown_text)
+        return pdf_bytes, "paper_sketch.pdf", "application/pdf"
+
+
+_RENDERERS: Dict[str, type] = {"png": PngRenderer, "pdf": PdfRenderer}
+
+_renderer_name = os.environ.get("PAPERSKETCH_RENDERER", "png").lower()
+if _renderer_name not in _RENDERERS:
+    raise RuntimeError(
+        f"Unknown PAPERSKETCH_RENDERER {_renderer_name!r}; expected one of: {', '.join(_RENDERERS)}"
+    )
+_renderer: Renderer = _RENDERERS[_renderer_name]()
+
+
+def _cache_evict(token: str) -> None:
+    entry = _FILE_CACHE.pop(token, None)
+    if entry:
+        try:
+            os.unlink(entry.file_path)
+        except OSError:
+            pass
+
+
+def _write_temp_file(file_bytes: bytes, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(prefix="papersketch-", suffix=suffix, delete=False) as f:
+        f.write(file_bytes)
+    return f.name
+
+
+async def _cache_put_file(file_bytes: bytes, filename: str, mime_type: str) -> str:
+    token = secrets.token_urlsafe(12)
+    # Disk write runs on a worker thread; cache bookkeeping stays on the event loop.
+    file_path = await asyncio.to_thread(_write_temp_file, file_bytes, Path(filename).suffix)
+    expires_at = time.time() + _FILE_TTL_SECONDS
+    _FILE_CACHE[token] = CacheEntry(file_path, filename, mime_type, expires_at)
+    heapq.heappush(_EXPIRY_HEAP, (expires_at, token))
+    if len(_FILE_CACHE) > _FILE_CACHE_MAX:
+        _cache_evict(next(iter(_FILE_CACHE)))
     return token
 
 
-def cache_get_file(token: str) -> Optional[Tuple[bytes, str, str]]:
+def cache_get_file(token: str) -> Optional[Tuple[str, str, str]]:
     """
     Exported for server.py route to retrieve cached files.
-    Returns (file_bytes, filename, mime_type) if present and not expired, else None.
+    Returns (file_path, filename, mime_type) if present and not expired, else None.
     """
-    item = _FILE_CACHE.get(token)
-    if not item:
+    entry = _FILE_CACHE.get(token)
+    if not entry:
         return None
-    file_bytes, filename, mime_type, expires_at = item
-    if time.time() > expires_at:
-        _FILE_CACHE.pop(token, None)
+    if time.time() > entry.expires_at:
+        _cache_evict(token)
         return None
-    return file_bytes, filename, mime_type
+    _FILE_CACHE.move_to_end(token)
+    return entry.file_path, entry.filename, entry.mime_type
+
+
+def _cache_refresh_file(token: str) -> bool:
+    """
+    Reuse a cached file: restart its TTL so the returned download link gets
+    the full lifetime. Returns False if the file is missing or expired.
+    """
+    if not cache_get_file(token):
+        return False
+    expires_at = time.time() + _FILE_TTL_SECONDS
+    _FILE_CACHE[token].expires_at = expires_at
+    heapq.heappush(_EXPIRY_HEAP, (expires_at, token))
+    return True
+
+
+def cache_clear() -> None:
+    """
+    Exported for server.py shutdown: removes all cached files from disk.
+    """
+    for token in list(_FILE_CACHE):
+        _cache_evict(token)
+    _EXPIRY_HEAP.clear()
+
+
+async def close_client() -> None:
+    """
+    Exported for server.py shutdown: closes the pooled PaperSketch HTTP client.
+    """
+    await _client.aclose()
 
 
 def _cache_cleanup_expired() -> None:
     now = time.time()
-    expired = [k for k, (_, __, ___, exp) in _FILE_CACHE.items() if exp < now]
-    for k in expired:
-        _FILE_CACHE.pop(k, None)
+    while _EXPIRY_HEAP and _EXPIRY_HEAP[0][0] < now:
+        _, token = heapq.heappop(_EXPIRY_HEAP)
+        entry = _FILE_CACHE.get(token)
+        if entry and entry.expires_at < now:
+            _cache_evict(token)
 
 
 def _load_widget_html() -> str:
     log("Loading widget HTML")
-    if WIDGET_HTML_PATH.exists():
-        html = WIDGET_HTML_PATH.read_text(encoding="utf8")
-        log(f"Widget HTML loaded ({len(html)} bytes)")
-        return html
-    raise FileNotFoundError(f"Widget HTML not found at {WIDGET_HTML_PATH}")
+    # Read once as bytes (no separate exists() stat); decoded a single time here
+    # because TextResourceContents only accepts str.
+    try:
+        data = WIDGET_HTML_PATH.read_bytes()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Widget HTML not found at {WIDGET_HTML_PATH}") from None
+    log(f"Widget HTML loaded ({len(data)} bytes)")
+    return data.decode("utf-8")
 
 
 PAPERSKETCH_WIDGET_HTML = _load_widget_html()
 
 
-def _widget_meta() -> Dict[str, Any]:
-    return {
-        "openai/outputTemplate": WIDGET_TEMPLATE_URI,
-        "openai/toolInvocation/invoking": WIDGET_INVOKING,
-        "openai/toolInvocation/invoked": WIDGET_INVOKED,
-        "openai/widgetAccessible": True,
-    }
+WIDGET_META: Dict[str, Any] = {
+    "openai/outputTemplate": WIDGET_TEMPLATE_URI,
+    "openai/toolInvocation/invoking": WIDGET_INVOKING,
+    "openai/toolInvocation/invoked": WIDGET_INVOKED,
+    "openai/widgetAccessible": True,
+}
 
 
 # --- Tool schema ---
 TOOL_INPUT_SCHEMA: Dict[str, Any] = {
     "type": "object",
     "properties": {
-        "url": {"type": "string"},
+        "url": {"type": "string", "minLength": 1},
         "lang": {"type": "string", "enum": ["en", "ch"], "default": "en"},
     },
     "required": ["url"],
     "additionalProperties": False,
 }
 
+POLL_TOOL_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "jobId": {"type": "string"},
+    },
+    "required": ["jobId"],
+    "additionalProperties": False,
+}
+
+# tool name -> compiled validator (returns args with schema defaults applied, e.g. lang="en")
+_ARG_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    TOOL_NAME: fastjsonschema.compile(TOOL_INPUT_SCHEMA),
+    START_TOOL_NAME: fastjsonschema.compile(TOOL_INPUT_SCHEMA),
+    POLL_TOOL_NAME: fastjsonschema.compile(POLL_TOOL_INPUT_SCHEMA),
+}
+
+
+# Tool and resource listings are constant for the process lifetime; build them once.
+_TOOLS_LIST: List[types.Tool] = [
+    types.Tool(
+        name=TOOL_NAME,
+        title="Summarize paper",
+        description="Summarize an academic PDF and render a PaperSketch inline card.",
+        inputSchema=TOOL_INPUT_SCHEMA,
+        _meta=WIDGET_META,
+    ),
+    types.Tool(
+        name=START_TOOL_NAME,
+        title="Start paper summary",
+        description=(
+            "Start summarizing an academic PDF in the background. "
+            f"Returns a jobId to pass to {POLL_TOOL_NAME}."
+        ),
+        inputSchema=TOOL_INPUT_SCHEMA,
+    ),
+    types.Tool(
+        name=POLL_TOOL_NAME,
+        title="Get paper summary",
+        # No output template: the inline card can't render a pending {jobId, status} result
+        description=(
+            f"Check a {START_TOOL_NAME} job; once done, returns the summary and file URL."
+        ),
+        inputSchema=POLL_TOOL_INPUT_SCHEMA,
+    ),
+]
+
+_RESOURCES_LIST: List[types.Resource] = [
+    types.Resource(
+        name=WIDGET_TITLE,
+        title=WIDGET_TITLE,
+        uri=WIDGET_TEMPLATE_URI,
+        description="PaperSketch widget",
+        mimeType=MIME_TYPE,
+        _meta=WIDGET_META,
+    )
+]
+
 
 @mcp._mcp_server.list_tools()
 async def _list_tools() -> List[types.Tool]:
     log("list_tools called")
-    return [
-        types.Tool(
-            name=TOOL_NAME,
-            title="Summarize paper",
-            description="Summarize an academic PDF and render a PaperSketch inline card.",
-            inputSchema=TOOL_INPUT_SCHEMA,
-            _meta=_widget_meta(),
-        )
-    ]
+    return _TOOLS_LIST
 
 
 @mcp._mcp_server.list_resources()
 async def _list_resources() -> List[types.Resource]:
     log("list_resources called")
-    return [
-        types.Resource(
-            name=WIDGET_TITLE,
-            title=WIDGET_TITLE,
-            uri=WIDGET_TEMPLATE_URI,
-            description="PaperSketch widget",
-            mimeType=MIME_TYPE,
-            _meta=_widget_meta(),
-        )
-    ]
+    return _RESOURCES_LIST
+
+
+# The widget HTML is fixed for the process lifetime, so the read result is built once.
+_WIDGET_RESOURCE_RESULT = types.ServerResult(
+    types.ReadResourceResult(
+        contents=[
+            types.TextResourceContents(
+                uri=WIDGET_TEMPLATE_URI,
+                mimeType=MIME_TYPE,
+                text=PAPERSKETCH_WIDGET_HTML,
+                _meta=WIDGET_META,
+            )
+        ]
+    )
+)
 
 
 async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerResult:
@@ -142,114 +368,256 @@ async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerR
             )
         )
 
-    contents = [
-        types.TextResourceContents(
-            uri=WIDGET_TEMPLATE_URI,
-            mimeType=MIME_TYPE,
-            text=PAPERSKETCH_WIDGET_HTML,
-            _meta=_widget_meta(),
-        )
-    ]
-
     log("READ_RESOURCE done")
-    return types.ServerResult(types.ReadResourceResult(contents=contents))
+    return _WIDGET_RESOURCE_RESULT
 
 
-async def _handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
-    log(f"CALL_TOOL start: {req.params.name}")
+# -----------------------------
+# Background jobs
+# job_id -> (task, expires_at_epoch)
+# -----------------------------
+_JOBS: Dict[str, Tuple[asyncio.Task, float]] = {}
 
-    if req.params.name != TOOL_NAME:
-        log("CALL_TOOL unknown tool")
-        return types.ServerResult(
-            types.CallToolResult(
-                content=[types.TextContent(type="text", text=f"Unknown tool: {req.params.name}")],
-                isError=True,
-            )
+
+def _jobs_cleanup_expired() -> None:
+    now = time.time()
+    expired = [k for k, (_, exp) in _JOBS.items() if exp < now]
+    for k in expired:
+        task, _ = _JOBS.pop(k)
+        task.cancel()
+
+
+def _retrieve_task_exception(task: asyncio.Task) -> None:
+    # Failed tasks nobody awaits (unpolled jobs, abandoned in-flight renders) would
+    # otherwise log "Task exception was never retrieved" when dropped.
+    if not task.cancelled():
+        task.exception()
+
+
+# Fixed text blocks shared by every tool result; only structuredContent varies per call.
+_GENERATED_CONTENT = [types.TextContent(type="text", text="PaperSketch generated.")]
+_PENDING_CONTENT = [types.TextContent(type="text", text="PaperSketch is still being generated.")]
+
+
+def _tool_error(text: str) -> types.ServerResult:
+    return types.ServerResult(
+        types.CallToolResult(
+            content=[types.TextContent(type="text", text=text)],
+            isError=True,
         )
+    )
 
-    args = req.params.arguments or {}
-    url = args.get("url")
-    lang = args.get("lang", "en")
 
-    if not url or not isinstance(url, str):
-        log("CALL_TOOL invalid args")
-        return types.ServerResult(
-            types.CallToolResult(
-                content=[types.TextContent(type="text", text="Missing required argument: url")],
-                isError=True,
-            )
+def _tool_summary_result(structured_content: Dict[str, Any]) -> types.ServerResult:
+    return types.ServerResult(
+        types.CallToolResult(
+            content=_GENERATED_CONTENT,
+            structuredContent=structured_content,
+            _meta=WIDGET_META,
         )
+    )
 
-    # Clean expired cache entries occasionally
-    _cache_cleanup_expired()
 
-    # 1) Call PaperSketch API
-    log(f"CALL_TOOL invoking PaperSketch API: {url}")
+# -----------------------------
+# In-flight requests
+# (url, lang) -> task, so concurrent identical calls share one API call and render
+# -----------------------------
+_IN_FLIGHT: Dict[Tuple[str, str], asyncio.Task] = {}
+
+
+async def _summarize_and_render(url: str, lang: str) -> Dict[str, Any]:
+    """
+    Call the PaperSketch API, render the file, and return the widget's structured content.
+
+    Concurrent calls for the same (url, lang) wait on a single in-flight task.
+    """
+    key = (url, lang)
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_summarize_and_render(url, lang))
+        _IN_FLIGHT[key] = task
+        task.add_done_callback(lambda t: _IN_FLIGHT.pop(key, None))
+        task.add_done_callback(_retrieve_task_exception)
+    # Shielded: one caller being cancelled must not cancel the work others await
+    return await asyncio.shield(task)
+
+
+async def _timed_summarize(url: str, lang: str) -> Dict[str, Any]:
+    # Timed on its own so the log isn't inflated by the concurrent browser launch
     t0 = time.time()
-    data = _client.summarize(url=url, lang=lang)
+    data = await _client.summarize(url=url, lang=lang)
     log(f"CALL_TOOL PaperSketch API returned in {time.time() - t0:.2f}s")
+    return data
 
-    raw_summary = (
-        data.get("paperSketch")
-        or data.get("summary")
-        or data.get("paper_sketch")
-        or ""
-    )
 
-    # 2) Generate PNG and return a small URL token (NOT base64)
-    image_filename = "paper_sketch.png"
-    image_url = ""
+async def _run_summarize_and_render(url: str, lang: str) -> Dict[str, Any]:
+    # Clean expired cache entries occasionally
+    _cache_cleanup_expired()
+
+    key = (url, lang)
+    token: Optional[str] = None
+    cached = _SUMMARY_CACHE.get(key)
+    if cached and cached[2] > time.time():
+        # Reuse the API response, and the rendered file if it is still cached
+        data, token, expires_at = cached
+        if token and not _cache_refresh_file(token):
+            token = None
+        _SUMMARY_CACHE.move_to_end(key)
+        log(f"CALL_TOOL summary cache hit: {url}")
+    else:
+        # 1) Call PaperSketch API
+        log(f"CALL_TOOL invoking PaperSketch API: {url}")
+        # Launch the browser while the API call is in flight: latency = max, not sum
+        data, _ = await asyncio.gather(
+            _timed_summarize(url, lang),
+            _renderer.prewarm(),
+        )
+        expires_at = time.time() + _SUMMARY_TTL_SECONDS
+
+    raw_summary = data["paperSketch"]  # normalized by PaperSketchClient.summarize
 
-    if raw_summary:
+    # 2) Render the file and return a small URL token (NOT base64)
+    filename = ""
+    mime_type = ""
+    file_url = ""
+
+    if raw_summary and token is None:
+        digest = hashlib.blake2b(raw_summary.encode(), digest_size=16).hexdigest()
+        token = _HASH_TO_TOKEN.get(digest)
+        if token and not _cache_refresh_file(token):
+            token = None
+        elif token:
+            _HASH_TO_TOKEN.move_to_end(digest)
+
+    if raw_summary and token is None:
         try:
             t1 = time.time()
 
-            # Tune these for your preferred look:
-            # - width_px ~ 1000-1400 usually good
-            # - device_scale_factor 2.0 = crisp text
-            png_bytes = await markdown_to_png_bytes(raw_summary, width_px=1200, device_scale_factor=2.0)
+            file_bytes, filename, mime_type = await _renderer.render(raw_summary)
 
-            token = _cache_put_file(png_bytes, image_filename, "image/png")
-
-            base = os.environ.get("PAPERSKETCH_PUBLIC_BASE_URL", "").rstrip("/")
-            if base:
-                image_url = f"{base}/papersketch/file/{token}"
-            else:
-                # Fallback for local dev (will NOT work inside ChatGPT widget)
-                image_url = f"/papersketch/file/{token}"
+            token = await _cache_put_file(file_bytes, filename, mime_type)
+            _HASH_TO_TOKEN[digest] = token
+            _HASH_TO_TOKEN.move_to_end(digest)
+            if len(_HASH_TO_TOKEN) > _FILE_CACHE_MAX:
+                _HASH_TO_TOKEN.popitem(last=False)
 
             log(
-                f"PNG generated+cached in {time.time() - t1:.2f}s "
-                f"(token={token}, {len(png_bytes)} bytes)"
+                f"{mime_type} generated+cached in {time.time() - t1:.2f}s "
+                f"(token={token}, {len(file_bytes)} bytes)"
             )
         except Exception as e:
             # Don’t fail the whole tool if export fails; still return the summary.
-            log(f"Image generation failed: {e}")
-
-    structured_content = {
+            log(f"File generation failed: {e}")
+
+    _SUMMARY_CACHE[key] = (data, token, expires_at)
+    if len(_SUMMARY_CACHE) > _FILE_CACHE_MAX:
+        _SUMMARY_CACHE.popitem(last=False)
+
+    item = cache_get_file(token) if token else None
+    if item:
+        _, filename, mime_type = item
+        base = os.environ.get("PAPERSKETCH_PUBLIC_BASE_URL", "").rstrip("/")
+        if base:
+            file_url = f"{base}/papersketch/file/{token}"
+        else:
+            # Fallback for local dev (will NOT work inside ChatGPT widget)
+            file_url = f"/papersketch/file/{token}"
+
+    is_image = mime_type.startswith("image/")
+    return {
         "summary": raw_summary,
         "version": data.get("version"),
         "modelInfo": data.get("modelInfo"),
-        "imageUrl": image_url,
-        "imageFilename": image_filename,
+        "imageUrl": file_url if is_image else "",
+        "imageFilename": filename if is_image else "",
 
-        # Backward compatibility: if your widget still expects pdfUrl, point it to the image.
-        "pdfUrl": image_url,
-        "pdfFilename": image_filename,
+        # Backward compatibility: if your widget still expects pdfUrl, point it to the rendered file.
+        "pdfUrl": file_url,
+        "pdfFilename": filename,
     }
 
-    meta = _widget_meta()
+
+async def _handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
+    log(f"CALL_TOOL start: {req.params.name}")
+
+    name = req.params.name
+    args = req.params.arguments or {}
+
+    validate = _ARG_VALIDATORS.get(name)
+    if validate is None:
+        log("CALL_TOOL unknown tool")
+        return _tool_error(f"Unknown tool: {name}")
+
+    # Rejects a missing/empty url and any lang outside the schema enum (lists
+    # included) before the values are used as cache keys.
+    try:
+        args = validate(args)
+    except fastjsonschema.JsonSchemaException as e:
+        log("CALL_TOOL invalid args")
+        return _tool_error(f"Invalid arguments: {e.message}")
+
+    if name == POLL_TOOL_NAME:
+        return _handle_poll_job(args)
+
+    url = args["url"]
+    lang = args["lang"]
+
+    if name == START_TOOL_NAME:
+        # Long-running work goes to a background task; the client polls for the result.
+        _jobs_cleanup_expired()
+        job_id = secrets.token_urlsafe(12)
+        task = asyncio.create_task(_summarize_and_render(url, lang))
+        task.add_done_callback(_retrieve_task_exception)
+        _JOBS[job_id] = (task, time.time() + _FILE_TTL_SECONDS)
+        log(f"CALL_TOOL job started (jobId={job_id})")
+        return types.ServerResult(
+            types.CallToolResult(
+                content=[types.TextContent(type="text", text=f"PaperSketch job started: {job_id}")],
+                structuredContent={"jobId": job_id, "status": "pending"},
+            )
+        )
+
+    structured_content = await _summarize_and_render(url, lang)
 
     log("CALL_TOOL done, returning result")
+    return _tool_summary_result(structured_content)
+
+
+def _handle_poll_job(args: Dict[str, Any]) -> types.ServerResult:
+    job_id = args.get("jobId")
+    job = _JOBS.get(job_id) if isinstance(job_id, str) else None
+    if job is None:
+        log("CALL_TOOL unknown job")
+        return _tool_error(f"Unknown or expired job: {job_id}")
+
+    task, _ = job
+    if not task.done():
+        return types.ServerResult(
+            types.CallToolResult(
+                content=_PENDING_CONTENT,
+                structuredContent={"jobId": job_id, "status": "pending"},
+            )
+        )
+
+    error = "cancelled" if task.cancelled() else task.exception()
+    if error is not None:
+        _JOBS.pop(job_id, None)
+        log(f"CALL_TOOL job failed (jobId={job_id}): {error}")
+        return _tool_error(f"PaperSketch job failed: {error}")
+
+    log(f"CALL_TOOL job done (jobId={job_id})")
     return types.ServerResult(
         types.CallToolResult(
-            content=[types.TextContent(type="text", text="PaperSketch generated.")],
-            structuredContent=structured_content,
-            _meta=meta,
+            content=_GENERATED_CONTENT,
+            structuredContent={**task.result(), "jobId": job_id, "status": "done"},
         )
     )
 
 
 # Wire handlers
+# Registered directly in the low-level server's request_handlers table rather than
+# via the @call_tool()/@read_resource() decorators: those wrappers re-validate
+# arguments against inputSchema (jsonschema) and structured output on every call,
+# and convert return values. Our handlers build ServerResult themselves.
 mcp._mcp_server.request_handlers[types.ReadResourceRequest] = _handle_read_resource
 mcp._mcp_server.request_handlers[types.CallToolRequest] = _handle_call_tool